@@ -5,7 +5,7 @@ import os
 import logging
 from datetime import datetime
 import argparse
-from virt_otg import VirtOTG
+from virt_otg import VirtOTG, MAX_CHAIN_DEPTH
 
 # Check if running as root
 if os.geteuid() != 0:
@@ -26,9 +26,16 @@ parser = argparse.ArgumentParser(description='Backup VM disks to external drive'
 parser.add_argument('--domain', type=str, help='Name of the domain to backup', required=True)
 parser.add_argument('--drive', type=str, help='Path to the external drive', required=True)
 parser.add_argument('--full', action='store_true', help='Perform a full backup')
+parser.add_argument('--chunk-size-mb', type=int, default=4,
+                    help='Copy chunk size in MiB (default: 4). Up to 16 is reasonable for slow external drives')
+parser.add_argument('--direct-io', action='store_true',
+                    help='Copy with O_DIRECT when io_uring is unavailable, keeping images out of the page cache')
 args = parser.parse_args()
+if args.chunk_size_mb <= 0:
+    parser.error('--chunk-size-mb must be a positive integer')
 
-virtotg = VirtOTG(args.domain, args.drive)
+virtotg = VirtOTG(args.domain, args.drive, chunk_size=args.chunk_size_mb * 1024 * 1024,
+                  direct_io=args.direct_io)
 
 def main():
     """Main execution function."""
@@ -40,24 +47,41 @@ def main():
             sys.exit(1)
 
         # Get disk paths
-        disk_paths = virtotg.get_disk_paths()
-        snap_files = [disk_path for disk_path in disk_paths if disk_path.endswith(".snap")]
+        disk_info = virtotg.get_disk_info()
+        disk_paths = disk_info.paths
+        snap_count = disk_info.is_snap.count(True)
+
+        # Every image in a qcow2 chain slows down reads, so consolidate long
+        # chains with a full backup instead of stacking more overlays. The
+        # full routine only commits .snap overlays, so other chains are left
+        # for the user to consolidate
+        if not args.full:
+            for disk_path, is_snap in zip(disk_paths, disk_info.is_snap):
+                chain_depth = virtotg.get_chain_depth(disk_path)
+                if chain_depth <= MAX_CHAIN_DEPTH:
+                    continue
+                if is_snap:
+                    logging.warning(f"Backing chain depth {chain_depth} of {disk_path} exceeds {MAX_CHAIN_DEPTH}, performing a full backup")
+                    args.full = True
+                else:
+                    logging.error(f"Backing chain depth {chain_depth} of {disk_path} exceeds {MAX_CHAIN_DEPTH}, "
+                                  f"but its top image is not a .snap overlay. Consolidate the chain manually "
+                                  f"(e.g. virsh blockcommit --active --pivot)")
         
         if args.full:
             logging.info("Performing full backup routine")
 
             # Perform blockcommit
-            disks_to_rm = virtotg.perform_blockcommit(disk_paths, only_suffix="snap")
+            disks_to_rm, backing_disk_paths = virtotg.perform_blockcommit(disk_paths, only_suffix="snap", refresh_paths=True)
             
             # Cleanup temporary disk snapshots
             virtotg.cleanup_disks(disks_to_rm)
 
             # Create new snapshot
-            backing_disk_paths = virtotg.get_disk_paths()
             virtotg.create_snapshot(backing_disk_paths, "snap")
         
             # cleanup the disks on the external drive
-            remote_disks = [os.path.join(args.drive, os.path.basename(backing_disk_path)) for backing_disk_path in backing_disk_paths]    
+            remote_disks = [os.path.join(args.drive, os.path.basename(backing_disk_path)) for backing_disk_path in backing_disk_paths]
             virtotg.cleanup_disks(remote_disks)
 
             # Backup the backing files
@@ -66,16 +90,16 @@ def main():
         else:
             logging.info("Performing incremental backup routine")
             # cant perform incremental backup if there are not snap files in the backing
-            if snap_files:
+            if snap_count:
                 virtotg.create_snapshot(disk_paths, "tmp") # snap disks
 
                 # Backup the active disks
                 backup_time = datetime.now().strftime('%Y%m%d_%H%M%S')
                 virtotg.backup_disks(disk_paths, intermediate_dir=backup_time)
 
-            # Perform blockcommit
-            tmp_disk_paths = virtotg.get_disk_paths()
-            disks_to_rm = virtotg.perform_blockcommit(tmp_disk_paths, shallow=True)
+            # Perform blockcommit. The disks only changed if a snapshot was taken
+            tmp_disk_paths = virtotg.get_disk_paths() if snap_count else disk_paths
+            disks_to_rm, _ = virtotg.perform_blockcommit(tmp_disk_paths, shallow=True)
 
             # Cleanup temporary disk snapshots
             virtotg.cleanup_disks(disks_to_rm)
@@ -24,9 +24,16 @@ logging.basicConfig(
 parser = argparse.ArgumentParser(description='Backup VM disks to external drive')
 parser.add_argument('--domain', type=str, help='Name of the domain to backup', required=True)
 parser.add_argument('--drive', type=str, help='Path to the external drive', required=True)
+parser.add_argument('--chunk-size-mb', type=int, default=4,
+                    help='Copy chunk size in MiB (default: 4). Up to 16 is reasonable for slow external drives')
+parser.add_argument('--direct-io', action='store_true',
+                    help='Copy with O_DIRECT when io_uring is unavailable, keeping images out of the page cache')
 args = parser.parse_args()
+if args.chunk_size_mb <= 0:
+    parser.error('--chunk-size-mb must be a positive integer')
 
-virtotg = VirtOTG(args.domain, args.drive)
+virtotg = VirtOTG(args.domain, args.drive, chunk_size=args.chunk_size_mb * 1024 * 1024,
+                  direct_io=args.direct_io)
 
 def main():
     """Main execution function."""
@@ -40,15 +47,18 @@ def main():
         # Get disk paths
         disk_paths = virtotg.get_disk_paths()
 
+        # List the external drive once instead of checking each disk
+        remote_files = set(os.listdir(args.drive))
+
         # Copy back in the disk files
         for disk_path in disk_paths:
             # move the original disk file to the disk path with the .bak extension to create a backup in case something is wrong with the transfer
-            virtotg.run_command(f"mv {disk_path} {disk_path}.bak")
+            os.rename(disk_path, f"{disk_path}.bak")
 
             # copy in the disk file from the external drive
-            remote_disk = os.path.join(args.drive, os.path.basename(disk_path))
-            if os.path.exists(remote_disk):
-                virtotg.copy_file_with_progress(remote_disk, disk_path)
+            disk_name = os.path.basename(disk_path)
+            if disk_name in remote_files:
+                virtotg.copy_file_with_progress(os.path.join(args.drive, disk_name), disk_path)
 
         # Re enable autostart
         virtotg.enable_autostart()
@@ -24,9 +24,16 @@ logging.basicConfig(
 parser = argparse.ArgumentParser(description='Backup VM disks to external drive')
 parser.add_argument('--domain', type=str, help='Name of the domain to backup', required=True)
 parser.add_argument('--drive', type=str, help='Path to the external drive', required=True)
+parser.add_argument('--chunk-size-mb', type=int, default=4,
+                    help='Copy chunk size in MiB (default: 4). Up to 16 is reasonable for slow external drives')
+parser.add_argument('--direct-io', action='store_true',
+                    help='Copy with O_DIRECT when io_uring is unavailable, keeping images out of the page cache')
 args = parser.parse_args()
+if args.chunk_size_mb <= 0:
+    parser.error('--chunk-size-mb must be a positive integer')
 
-virtotg = VirtOTG(args.domain, args.drive)
+virtotg = VirtOTG(args.domain, args.drive, chunk_size=args.chunk_size_mb * 1024 * 1024,
+                  direct_io=args.direct_io)
 
 def main():
     """Main execution function."""
@@ -38,21 +45,22 @@ def main():
             sys.exit(1)
         
         # Get disk paths
-        disk_paths = virtotg.get_disk_paths()
+        disk_info = virtotg.get_disk_info()
+        disk_paths = disk_info.paths
 
         # Destroy the domain to release disk locks
         virtotg.destroy_domain()
         virtotg.disable_autostart()
 
         # Cleanup any existing disk snapshots on the remote
-        remote_disks = [os.path.join(args.drive, os.path.basename(disk_path)) for disk_path in disk_paths]    
+        remote_disks = [os.path.join(args.drive, basename) for basename in disk_info.basenames]
         virtotg.cleanup_disks(remote_disks)
      
         # Backup the backing files
         virtotg.backup_disks(disk_paths)
     
         # unmount the external drive. use the mount point to unmount
-        virtotg.run_command(f"umount {mount_point}")
+        virtotg.run_command(["umount", mount_point])
 
         logging.info("Transfer completed successfully. You can now remove the external drive...")
 
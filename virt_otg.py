@@ -4,62 +4,204 @@ import time
 import sys
 import os
 import logging
+import errno
+import re
+import shlex
+import mmap
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime
 import xml.etree.ElementTree as ET
+import libvirt
+
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
+# io_uring ring size and number of read/write pairs kept in flight per batch
+IOURING_QUEUE_DEPTH = 32
+IOURING_INFLIGHT = 16
+
+# Largest io_uring buffer. The registered pool is pinned memory, so it is
+# kept at IOURING_INFLIGHT * 1 MiB per copy whatever the chunk size
+IOURING_BUFFER_SIZE = 1024 * 1024
+
+# Hypervisor connection used for all domain operations
+LIBVIRT_URI = 'qemu:///system'
+
+# Default transfer size per copy syscall
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Backing chain depth above which backup.py turns an incremental backup
+# into a full one
+MAX_CHAIN_DEPTH = 8
+
+# Minimum seconds between progress bar updates
+PROGRESS_INTERVAL = 0.5
+
+# Maximum number of disks copied concurrently by backup_disks
+MAX_BACKUP_WORKERS = 4
+
+def disk_source_file(disk):
+    """Get the source file of a <disk> element if it is a disk device.
+
+    Returns:
+        str: The source file path, or None for other devices (cdrom, floppy)
+            and disks without a file source
+    """
+    if disk.get('device') != 'disk':
+        return None
+    source = disk.find('source')
+    if source is None:
+        return None
+    return source.get('file') or None
+
+@dataclass
+class DiskInfo:
+    """Disk records of a domain, kept as parallel lists."""
+    paths: list[str] = field(default_factory=list)
+    is_snap: list[bool] = field(default_factory=list)
+    basenames: list[str] = field(default_factory=list)
+
+    def append(self, path):
+        self.paths.append(path)
+        self.is_snap.append(path.endswith(".snap"))
+        self.basenames.append(os.path.basename(path))
 
 class VirtOTG:
-    def __init__(self, domain, drive):
+    def __init__(self, domain, drive, chunk_size=DEFAULT_CHUNK_SIZE, direct_io=False):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
         self.drive = drive
         self.domain = domain
+        self.chunk_size = chunk_size
+        # Opt-in synchronous O_DIRECT copies when io_uring is unavailable
+        self.direct_io = direct_io
+        # Domain XML only changes on snapshot/blockcommit, which reset these
+        self._xml_cache = None
+        self._disk_info = None
+        # One persistent libvirt connection instead of a virsh process per call
+        self._conn = libvirt.open(LIBVIRT_URI)
+        self._dom = None
+        self._dominfo = None
 
     def run_command(self, command):
-        """Execute a shell command and return its output."""
+        """Execute a command and return its output.
+
+        An argv list is executed directly; a string is run through the shell.
+        """
+        use_shell = isinstance(command, str)
+        display = command if use_shell else shlex.join(command)
         try:
-            logging.info(f"Running command: {command}")
+            logging.info(f"Running command: {display}")
             result = subprocess.run(
                 command,
-                shell=True,
+                shell=use_shell,
                 check=True,
                 capture_output=True,
                 text=True
             )
             return result.stdout.strip()
         except subprocess.CalledProcessError as e:
-            logging.error(f"Command failed: {command}")
+            logging.error(f"Command failed: {display}")
             logging.error(f"Error output: {e.stderr}")
             raise
 
+    def _poll_until(self, done_pred, timeout=60, on_error='raise'):
+        """Poll with exponential backoff until done_pred returns True.
+
+        Args:
+            done_pred: Callable returning True once the operation has completed
+            timeout: Seconds to wait before giving up, or None to wait forever
+            on_error: What a libvirt error means: 'raise', 'done' or 'retry'
+
+        Returns:
+            bool: True if done_pred was satisfied, False if the timeout expired
+        """
+        interval = 0.1
+        started_waiting = time.time()
+        while True:
+            try:
+                if done_pred():
+                    return True
+            except libvirt.libvirtError:
+                if on_error == 'done':
+                    return True
+                if on_error == 'raise':
+                    raise
+            if timeout is not None and time.time() - started_waiting > timeout:
+                return False
+            time.sleep(interval)
+            interval = min(interval * 1.5, 1.0)
+
+    def _lookup_domain(self):
+        """Get the libvirt handle of the domain."""
+        if self._dom is None:
+            self._dom = self._conn.lookupByName(self.domain)
+        return self._dom
+
+    def _get_dominfo(self):
+        """Get the domain's state and autostart flag, queried once and cached.
+
+        Methods that change either value update the cached copy.
+        """
+        if self._dominfo is None:
+            dom = self._lookup_domain()
+            self._dominfo = {
+                'state': dom.info()[0],
+                'autostart': bool(dom.autostart()),
+            }
+        return self._dominfo
+
+    def _invalidate_xml_cache(self):
+        """Forget cached domain XML and disk records after the disks change."""
+        self._xml_cache = None
+        self._disk_info = None
+
     def get_domain_xml(self):
-        """Get domain XML using virsh command."""
+        """Get domain XML from libvirt, cached until the disks change."""
+        if self._xml_cache is not None:
+            return self._xml_cache
         try:
-            xml_output = self.run_command(f"virsh dumpxml {self.domain}")
-            return xml_output
-        except subprocess.CalledProcessError as e:
+            self._xml_cache = self._lookup_domain().XMLDesc(0)
+            return self._xml_cache
+        except libvirt.libvirtError as e:
             logging.error(f"Failed to get domain XML: {e}")
             sys.exit(1)
 
-    def get_disk_paths(self):
-        """Parse domain XML to get disk paths."""
+    def get_disk_info(self):
+        """Parse domain XML to get disk records, cached with the domain XML."""
+        if self._disk_info is not None:
+            return self._disk_info
         try:
             xml = self.get_domain_xml()
-            root = ET.fromstring(xml)
-            disk_paths = []
-            
-            for disk in root.findall(".//disk"):
-                if disk.get('device') == 'disk':
-                    source = disk.find('source')
-                    if source is not None:
-                        path = source.get('file')
-                        if path:
-                            disk_paths.append(path)
-            
-            return disk_paths
+            info = DiskInfo()
+
+            # Stream the XML and look at each <disk device='disk'> once it is
+            # complete, then free it
+            for _, elem in ET.iterparse(io.StringIO(xml)):
+                if elem.tag != 'disk':
+                    continue
+                path = disk_source_file(elem)
+                if path:
+                    info.append(path)
+                elem.clear()
+
+            self._disk_info = info
+            return info
         except Exception as e:
             logging.error(f"Failed to parse disk paths: {e}")
             sys.exit(1)
 
+    def get_disk_paths(self):
+        """Parse domain XML to get disk paths."""
+        return list(self.get_disk_info().paths)
+
     def create_snapshot(self, disk_paths, suffix):
-        """Create a diskonly snapshot using virsh."""
+        """Create a diskonly snapshot using libvirt."""
         snapshot_name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         # Create snapshot XML
@@ -81,24 +223,72 @@ class VirtOTG:
         </domainsnapshot>
         """
         
-        # Save snapshot XML to temporary file
-        xml_path = f"/tmp/{snapshot_name}.xml"
-        with open(xml_path, 'w') as f:
-            f.write(snapshot_xml)
-        
         try:
-            # Create snapshot using virsh
-            self.run_command(f"virsh snapshot-create {self.domain} {xml_path} --disk-only --quiesce")
-            os.remove(xml_path)
+            logging.info(f"Creating snapshot {snapshot_name} of domain {self.domain}")
+            self._lookup_domain().snapshotCreateXML(
+                snapshot_xml,
+                libvirt.VIR_DOMAIN_SNAPSHOT_CREATE_DISK_ONLY | libvirt.VIR_DOMAIN_SNAPSHOT_CREATE_QUIESCE
+            )
+            self._invalidate_xml_cache()
             return snapshot_name
         except Exception as e:
             logging.error(f"Failed to create snapshot: {e}")
-            if os.path.exists(xml_path):
-                os.remove(xml_path)
             raise
 
-    def perform_blockcommit(self, disk_paths, shallow=False, only_suffix=None):
-        """Perform blockcommit using virsh command."""
+    def get_backing_chain(self, disk_path):
+        """Get the image chain of a disk, top image first, using qemu-img."""
+        # -U allows reading the chain while a running domain holds the lock
+        output = self.run_command(["qemu-img", "info", "-U", "--backing-chain", "--output=json", disk_path])
+        return json.loads(output)
+
+    def get_chain_depth(self, disk_path):
+        """Get the number of images in the backing chain of a disk."""
+        return len(self.get_backing_chain(disk_path))
+
+    def _commit_offline(self, disk_path, shallow=False):
+        """Merge a disk of a shut off domain into its backing file with qemu-img.
+
+        Only the overlay's allocated clusters are written to the base, and the
+        domain definition is then pointed at the base, as a pivot would do.
+        """
+        chain = self.get_backing_chain(disk_path)
+        if len(chain) < 2:
+            raise ValueError(f"{disk_path} has no backing file to commit into")
+        base = chain[1] if shallow else chain[-1]
+
+        command = ["qemu-img", "commit", "-f", "qcow2"]
+        if not shallow:
+            command += ["-b", base['filename']]
+        command.append(disk_path)
+        self.run_command(command)
+
+        # Point the persistent definition at the base image
+        root = ET.fromstring(self._lookup_domain().XMLDesc(libvirt.VIR_DOMAIN_XML_INACTIVE))
+        for disk in root.iter('disk'):
+            if disk_source_file(disk) != disk_path:
+                continue
+            disk.find('source').set('file', base['filename'])
+            driver = disk.find('driver')
+            if driver is not None:
+                driver.set('type', base['format'])
+            backing_store = disk.find('backingStore')
+            if backing_store is not None:
+                disk.remove(backing_store)
+        self._conn.defineXML(ET.tostring(root, encoding='unicode'))
+
+    def perform_blockcommit(self, disk_paths, shallow=False, only_suffix=None, refresh_paths=False):
+        """Commit disk overlays into their backing files.
+
+        A running domain gets a live blockcommit and pivot through libvirt. A
+        shut off domain is committed directly with qemu-img, which avoids the
+        mirror job and pivot.
+
+        Returns:
+            tuple: Paths that were committed, and the domain's disk paths
+                afterwards if refresh_paths is set, otherwise None
+        """
+        dom = self._lookup_domain()
+        active = dom.isActive()
         executed_disk_paths = []
         for disk_path in disk_paths:
             try:
@@ -106,32 +296,358 @@ class VirtOTG:
                 if only_suffix and not disk_path.endswith(only_suffix):
                     continue
 
-                # Check if top and base are provided
-                self.run_command(f"virsh blockcommit {self.domain} {disk_path} --active --verbose --pivot {'--shallow' if shallow else ''}")
-                
-                started_waiting = time.time()
-                # Wait for blockcommit to complete
-                while True:
-                    output = self.run_command(f"virsh domblklist {self.domain} --details")
-                    if 'block_commit' not in output:
-                        break
-                    if time.time() - started_waiting > 60:
-                        logging.error(f"Blockcommit timed out on {disk_path}")
-                        raise TimeoutError("Blockcommit timed out on {disk_path}")
-                    time.sleep(1)
+                if not active:
+                    logging.info(f"Committing {disk_path} of shut off domain {self.domain} with qemu-img")
+                    self._commit_offline(disk_path, shallow=shallow)
+                    executed_disk_paths.append(disk_path)
+                    self._invalidate_xml_cache()
+                    continue
+
+                flags = libvirt.VIR_DOMAIN_BLOCK_COMMIT_ACTIVE
+                if shallow:
+                    flags |= libvirt.VIR_DOMAIN_BLOCK_COMMIT_SHALLOW
+                logging.info(f"Committing {disk_path} of domain {self.domain}")
+                dom.blockCommit(disk_path, None, None, 0, flags)
+
+                # Wait for the commit to catch up with the active layer, then
+                # pivot to the base image
+                def commit_pivoted():
+                    info = dom.blockJobInfo(disk_path, 0)
+                    if not info:
+                        raise RuntimeError(f"Blockcommit job on {disk_path} ended before pivot")
+                    if info['cur'] != info['end']:
+                        return False
+                    # cur == end also holds (at 0) before QEMU has started the
+                    # job, so libvirt may still refuse the pivot
+                    try:
+                        dom.blockJobAbort(disk_path, libvirt.VIR_DOMAIN_BLOCK_JOB_ABORT_PIVOT)
+                    except libvirt.libvirtError as e:
+                        if e.get_error_code() != libvirt.VIR_ERR_BLOCK_COPY_ACTIVE:
+                            raise
+                        return False
+                    return True
+
+                self._poll_until(commit_pivoted, timeout=None)
+
+                # Wait for the job to go away
+                if not self._poll_until(lambda: not dom.blockJobInfo(disk_path, 0)):
+                    logging.error(f"Blockcommit timed out on {disk_path}")
+                    raise TimeoutError(f"Blockcommit timed out on {disk_path}")
                 
                 executed_disk_paths.append(disk_path)
+                self._invalidate_xml_cache()
 
             except Exception as e:
                 logging.error(f"Failed to perform blockcommit on {disk_path}: {e}")
                 raise
             
-        return executed_disk_paths
+        return executed_disk_paths, self.get_disk_paths() if refresh_paths else None
+
+
+    def _direct_io_alignment(self, src_path, dst_path, buffer_size):
+        """Get the I/O alignment to copy between two files with O_DIRECT.
+
+        Offsets and lengths are aligned to the larger filesystem block size
+        of the two files. Buffers must be a multiple of it.
+
+        Returns:
+            int: The alignment in bytes, or None if O_DIRECT cannot be used
+        """
+        if not hasattr(os, 'O_DIRECT'):
+            return None
+        try:
+            align = max(os.statvfs(src_path).f_bsize,
+                        os.statvfs(os.path.dirname(os.path.abspath(dst_path))).f_bsize)
+        except OSError:
+            return None
+        if buffer_size % align:
+            return None
+        return align
+
+    def _advise_sequential(self, fd, file_size):
+        """Hint the kernel to read ahead aggressively for a sequential copy."""
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, file_size, os.POSIX_FADV_SEQUENTIAL)
+
+    def _drop_page_cache(self, src_fd, dst_fd):
+        """Drop cached pages of copied files since they are not read again.
+
+        The kernel only drops clean pages, so the destination is synced first.
+        """
+        if hasattr(os, 'posix_fadvise'):
+            os.fdatasync(dst_fd)
+            os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            os.posix_fadvise(dst_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+    def _copy_file_iouring(self, src_path, dst_path, file_size, chunk_size, report):
+        """Copy a file with batched io_uring read/write pairs.
+
+        Each chunk is submitted as a read linked to a write at the same offset,
+        so a single submit drains up to IOURING_INFLIGHT chunk transfers.
+        O_DIRECT is used when both filesystems allow it. If a filesystem
+        rejects O_DIRECT, whether at open or on the first batch, the ring copy
+        is redone with buffered fds.
+
+        Returns:
+            bool: True if the file was copied, False if io_uring is unavailable
+        """
+        if liburing is None:
+            return False
+
+        ring = liburing.io_uring()
+        try:
+            liburing.io_uring_queue_init(IOURING_QUEUE_DEPTH, ring, 0)
+        except OSError as e:
+            if e.errno in (errno.ENOSYS, errno.EPERM, errno.EOPNOTSUPP):
+                logging.info(f"io_uring unavailable, falling back to sendfile: {e}")
+                return False
+            raise
+
+        try:
+            buffer_size = min(chunk_size, IOURING_BUFFER_SIZE)
+            align = self._direct_io_alignment(src_path, dst_path, buffer_size)
+            if align is not None:
+                if self._copy_file_iouring_pass(ring, src_path, dst_path, file_size,
+                                                buffer_size, align, report):
+                    return True
+                logging.info("O_DIRECT unsupported, using buffered io_uring copy")
+            return self._copy_file_iouring_pass(ring, src_path, dst_path, file_size,
+                                                buffer_size, None, report)
+        finally:
+            liburing.io_uring_queue_exit(ring)
+
+    def _copy_file_iouring_pass(self, ring, src_path, dst_path, file_size, buffer_size, align, report):
+        """Run one io_uring copy of a file, with O_DIRECT if align is given.
+
+        Buffers and fds are registered with the ring when the memlock limit
+        allows it, in which case fd 0 is the source and fd 1 the destination.
+        Under O_DIRECT an unaligned tail is copied buffered after the ring.
 
+        Returns:
+            bool: True if the file was copied, False if the filesystem rejected
+                O_DIRECT before any data was copied
+        """
+        direct = align is not None
+        src_fd = dst_fd = -1
+        buffers = []
+        fixed = False
+        try:
+            try:
+                if direct:
+                    src_fd = os.open(src_path, os.O_RDONLY | os.O_DIRECT | os.O_NOATIME)
+                    dst_fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+                else:
+                    src_fd = os.open(src_path, os.O_RDONLY)
+                    dst_fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                    self._advise_sequential(src_fd, file_size)
+            except OSError as e:
+                if not (direct and e.errno == errno.EINVAL):
+                    raise
+                return False
+
+            # Anonymous mmap buffers are page aligned, as required by O_DIRECT
+            buffers = [
+                mmap.mmap(-1, buffer_size, flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS)
+                for _ in range(IOURING_INFLIGHT)
+            ]
+            cqes = liburing.io_uring_cqes(IOURING_QUEUE_DEPTH)
+
+            # Register buffers and fds up front so each SQE skips the page
+            # pinning and fd lookup. Pinning counts against RLIMIT_MEMLOCK.
+            try:
+                liburing.io_uring_register_buffers(ring, liburing.iovec(buffers), len(buffers))
+                try:
+                    liburing.io_uring_register_files(ring, [src_fd, dst_fd], 2)
+                except OSError:
+                    liburing.io_uring_unregister_buffers(ring)
+                    raise
+                fixed = True
+            except OSError as e:
+                if e.errno != errno.ENOMEM:
+                    raise
+                logging.info(f"Could not register io_uring buffers (check ulimit -l): {e}")
+
+            # O_DIRECT needs block-sized I/O, so an unaligned tail is copied
+            # buffered once the ring is done
+            ring_size = file_size - file_size % align if direct else file_size
+
+            copied = 0
+            offset = 0
+            first_batch = True
+            while offset < ring_size:
+                pending = 0
+                for slot, buf in enumerate(buffers):
+                    if offset >= ring_size:
+                        break
+                    length = min(buffer_size, ring_size - offset)
+
+                    sqe = liburing.io_uring_get_sqe(ring)
+                    if fixed:
+                        liburing.io_uring_prep_read_fixed(sqe, 0, buf, length, offset, slot)
+                        liburing.io_uring_sqe_set_flags(
+                            sqe, liburing.IOSQE_IO_LINK | liburing.IOSQE_FIXED_FILE)
+                    else:
+                        liburing.io_uring_prep_read(sqe, src_fd, buf, length, offset)
+                        liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_IO_LINK)
+                    liburing.io_uring_sqe_set_data64(sqe, 0)
+
+                    # user_data carries the expected length to spot short writes
+                    sqe = liburing.io_uring_get_sqe(ring)
+                    if fixed:
+                        liburing.io_uring_prep_write_fixed(sqe, 1, buf, length, offset, slot)
+                        liburing.io_uring_sqe_set_flags(sqe, liburing.IOSQE_FIXED_FILE)
+                    else:
+                        liburing.io_uring_prep_write(sqe, dst_fd, buf, length, offset)
+                    liburing.io_uring_sqe_set_data64(sqe, length)
+
+                    offset += length
+                    pending += 2
+
+                liburing.io_uring_submit(ring)
+                liburing.io_uring_wait_cqe_nr(ring, cqes, pending)
+                ready = liburing.io_uring_peek_batch_cqe(ring, cqes, pending)
+                try:
+                    for i in range(ready):
+                        cqe = cqes[i]
+                        if cqe.res < 0:
+                            raise OSError(-cqe.res, os.strerror(-cqe.res))
+                        if cqe.user_data:
+                            if cqe.res != cqe.user_data:
+                                raise OSError(errno.EIO, f"Short write to {dst_path}")
+                            copied += cqe.res
+                except OSError as e:
+                    # Some filesystems only reject O_DIRECT on first I/O. All
+                    # SQEs have completed, so the copy can be redone buffered
+                    if not (direct and first_batch and e.errno == errno.EINVAL):
+                        raise
+                    return False
+                finally:
+                    liburing.io_uring_cq_advance(ring, ready)
+
+                first_batch = False
+                report(copied)
+
+            if ring_size < file_size:
+                tail_src_fd = os.open(src_path, os.O_RDONLY)
+                try:
+                    tail = os.pread(tail_src_fd, file_size - ring_size, ring_size)
+                finally:
+                    os.close(tail_src_fd)
+                tail_dst_fd = os.open(dst_path, os.O_WRONLY)
+                try:
+                    if os.pwrite(tail_dst_fd, tail, ring_size) != len(tail):
+                        raise OSError(errno.EIO, f"Short write to {dst_path}")
+                finally:
+                    os.close(tail_dst_fd)
+                copied += len(tail)
+                report(copied)
+
+            if not direct:
+                self._drop_page_cache(src_fd, dst_fd)
+            return True
+        finally:
+            # Unregister so the ring can be reused for a buffered retry
+            if fixed:
+                liburing.io_uring_unregister_files(ring)
+                liburing.io_uring_unregister_buffers(ring)
+            for buf in buffers:
+                buf.close()
+            if src_fd >= 0:
+                os.close(src_fd)
+            if dst_fd >= 0:
+                os.close(dst_fd)
+
+    def _copy_file_range(self, src_path, dst_path, file_size, chunk_size, report):
+        """Copy a file within one filesystem with copy_file_range.
+
+        Lets the filesystem clone (reflink) or copy the data itself instead
+        of streaming it through userspace.
+
+        Returns:
+            bool: True if the file was copied, False if the filesystem does
+                not support copy_file_range for these files
+        """
+        with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+            copied = 0
+            while copied < file_size:
+                try:
+                    sent = os.copy_file_range(src.fileno(), dst.fileno(),
+                                              min(chunk_size, file_size - copied))
+                except OSError as e:
+                    if e.errno not in (errno.EXDEV, errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL):
+                        raise
+                    logging.info(f"copy_file_range unsupported, using another copy method: {e}")
+                    return False
+                if sent == 0:  # EOF reached
+                    break
+                copied += sent
+                report(copied)
+        return True
+
+    def _copy_file_direct(self, src_path, dst_path, file_size, chunk_size, report):
+        """Copy a file with O_DIRECT reads and writes through one aligned buffer.
+
+        Keeps the image out of the page cache. The unaligned tail is written
+        padded to a full block and the destination is truncated afterwards.
+
+        Returns:
+            bool: True if the file was copied, False if O_DIRECT is unsupported
+        """
+        align = self._direct_io_alignment(src_path, dst_path, chunk_size)
+        if align is None:
+            return False
+
+        src_fd = dst_fd = -1
+        # Anonymous mmap buffers are page aligned, as required by O_DIRECT
+        buf = mmap.mmap(-1, chunk_size, flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS)
+        try:
+            try:
+                src_fd = os.open(src_path, os.O_RDONLY | os.O_DIRECT)
+                dst_fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                logging.info(f"O_DIRECT unsupported, using buffered copy: {e}")
+                return False
+
+            copied = 0
+            with memoryview(buf) as view:
+                while copied < file_size:
+                    try:
+                        read = os.readv(src_fd, [view])
+                        if read == 0:  # EOF reached
+                            break
+                        length = -(-read // align) * align
+                        written = os.writev(dst_fd, [view[:length]])
+                    except OSError as e:
+                        # Some filesystems only reject O_DIRECT on first I/O
+                        if e.errno != errno.EINVAL or copied:
+                            raise
+                        logging.info(f"O_DIRECT unsupported, using buffered copy: {e}")
+                        return False
+                    if written != length:
+                        raise OSError(errno.EIO, f"Short write to {dst_path}")
+                    copied += read
+                    report(copied)
+
+            # Drop the padding written with the tail
+            os.ftruncate(dst_fd, copied)
+            return True
+        finally:
+            if src_fd >= 0:
+                os.close(src_fd)
+            if dst_fd >= 0:
+                os.close(dst_fd)
+            buf.close()
+
+    def copy_file_with_progress(self, src_path, dst_path, chunk_size = None, show_progress=True) -> None:
+        if chunk_size is None:
+            chunk_size = self.chunk_size
+        elif chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
 
-    def copy_file_with_progress(self, src_path, dst_path, chunk_size = 1024 * 1024) -> None:
         # Check if running interactively
-        is_interactive = sys.stdout.isatty()
+        is_interactive = show_progress and sys.stdout.isatty()
         
         # Get file size
         file_size = os.path.getsize(src_path)
@@ -153,15 +669,46 @@ class VirtOTG:
             total_size = format_size(total)
             sys.stdout.write(f'\rProgress: [{bar}] {percentage:.1f}% {current_size}/{total_size}')
             sys.stdout.flush()
+
+        last_progress_t = time.monotonic()
+
+        def report(current):
+            """Update the progress bar at most every PROGRESS_INTERVAL seconds"""
+            nonlocal last_progress_t
+            if not is_interactive:
+                return
+            now = time.monotonic()
+            if now - last_progress_t > PROGRESS_INTERVAL or current >= file_size:
+                last_progress_t = now
+                print_progress(current, file_size)
+        
+        # Within one filesystem copy_file_range lets the filesystem clone
+        # (reflink) or copy the data itself instead of streaming it through us
+        same_fs = (hasattr(os, 'copy_file_range') and os.stat(src_path).st_dev
+                   == os.stat(os.path.dirname(os.path.abspath(dst_path))).st_dev)
         
         copied = 0
         start_time = time.time()
         
         try:
             # Use different methods based on OS and file system
-            if hasattr(os, 'sendfile') and os.path.exists(src_path):
+            if file_size <= 4 * chunk_size:
+                # Small files gain nothing from the batched copy paths below
+                shutil.copyfile(src_path, dst_path)
+                copied = file_size
+            elif same_fs and self._copy_file_range(src_path, dst_path, file_size, chunk_size, report):
+                # The filesystem cloned or copied the data itself
+                copied = file_size
+            elif self._copy_file_iouring(src_path, dst_path, file_size, chunk_size, report):
+                # io_uring batches many chunk transfers per syscall
+                copied = file_size
+            elif self.direct_io and self._copy_file_direct(src_path, dst_path, file_size, chunk_size, report):
+                # O_DIRECT keeps multi-GB images out of the page cache
+                copied = file_size
+            elif hasattr(os, 'sendfile') and os.path.exists(src_path):
                 # sendfile is typically the fastest method on Linux
                 with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+                    self._advise_sequential(src.fileno(), file_size)
                     while copied < file_size:
                         try:
                             sent = os.sendfile(dst.fileno(), src.fileno(), None, 
@@ -169,8 +716,7 @@ class VirtOTG:
                             if sent == 0:  # EOF reached
                                 break
                             copied += sent
-                            if is_interactive:
-                                print_progress(copied, file_size)
+                            report(copied)
                         except OSError:
                             # Fallback if sendfile fails (e.g., different filesystems)
                             remaining = file_size - copied
@@ -179,19 +725,22 @@ class VirtOTG:
                                 break
                             dst.write(chunk)
                             copied += len(chunk)
-                            if is_interactive:
-                                print_progress(copied, file_size)
+                            report(copied)
+                    dst.flush()
+                    self._drop_page_cache(src.fileno(), dst.fileno())
             else:
                 # Fallback for systems without sendfile
                 with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+                    self._advise_sequential(src.fileno(), file_size)
                     while True:
                         chunk = src.read(chunk_size)
                         if not chunk:
                             break
                         dst.write(chunk)
                         copied += len(chunk)
-                        if is_interactive:
-                            print_progress(copied, file_size)
+                        report(copied)
+                    dst.flush()
+                    self._drop_page_cache(src.fileno(), dst.fileno())
             
             if is_interactive:
                 duration = time.time() - start_time
@@ -208,21 +757,42 @@ class VirtOTG:
         shutil.copystat(src_path, dst_path)
 
     def backup_disks(self, disk_paths, intermediate_dir=None):
-        """Copy disk files to external drive with progress tracking."""
-        for disk_path in disk_paths:
-            try:
-                if intermediate_dir:
-                    backup_dir = os.path.join(self.drive, intermediate_dir)
-                    os.makedirs(backup_dir, exist_ok=True)
-                else:
-                    backup_dir = self.drive
-                
+        """Copy disk files to external drive with progress tracking.
+
+        Disks are copied concurrently. The progress bar is only shown when a
+        single disk is copied, since parallel bars would overwrite each other.
+        """
+        if not disk_paths:
+            return
+
+        try:
+            if intermediate_dir:
+                backup_dir = os.path.join(self.drive, intermediate_dir)
+                os.makedirs(backup_dir, exist_ok=True)
+            else:
+                backup_dir = self.drive
+        except Exception as e:
+            logging.error(f"Failed to backup disk: {e}")
+            raise
+
+        show_progress = len(disk_paths) == 1
+        with ThreadPoolExecutor(max_workers=min(len(disk_paths), MAX_BACKUP_WORKERS)) as executor:
+            futures = {}
+            for disk_path in disk_paths:
                 dest = os.path.join(backup_dir, os.path.basename(disk_path))
                 logging.info(f"Backing up {disk_path} to {dest}")
-                self.copy_file_with_progress(disk_path, dest)
-            except Exception as e:
-                logging.error(f"Failed to backup disk: {e}")
-                raise
+                future = executor.submit(self.copy_file_with_progress, disk_path, dest,
+                                         show_progress=show_progress)
+                futures[future] = disk_path
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    logging.info(f"Finished backing up {futures[future]}")
+                except Exception as e:
+                    logging.error(f"Failed to backup disk: {e}")
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
 
     def cleanup_disks(self, disk_paths):
         """Remove temporary disk snapshots."""
@@ -231,7 +801,10 @@ class VirtOTG:
                 if disk_path.endswith(".qcow2") and not disk_path.startswith(self.drive):
                     raise ValueError(f"You are trying to delete a disk that is not on the external drive: {disk_path}. Aborting!")
 
-                self.run_command(f"rm -f {disk_path}")
+                try:
+                    os.unlink(disk_path)
+                except FileNotFoundError:
+                    pass
             except Exception as e:
                 logging.error(f"Failed to cleanup disk snapshot: {e}")
                 raise
@@ -246,24 +819,15 @@ class VirtOTG:
         # Get absolute path
         directory = os.path.abspath(directory)
         
-        # Get list of mounted filesystems
-        try:
-            mount_output = self.run_command("mount").splitlines()
-        except subprocess.CalledProcessError as e:
-            raise subprocess.CalledProcessError(
-                e.returncode,
-                e.cmd,
-                "Failed to get mount information"
-            )
-        
-        # Parse mount points from output
+        # Parse mount points from the kernel's mount table. The mount point
+        # is the fifth field, with special characters octal-escaped (\040)
         mount_points = []
-        for line in mount_output:
-            if line:
-                # Mount point is typically the second item when split on spaces
+        with open('/proc/self/mountinfo', 'r') as mountinfo:
+            for line in mountinfo:
                 parts = line.split()
-                if len(parts) >= 3:
-                    mount_points.append(os.path.abspath(parts[2]))
+                if len(parts) >= 5:
+                    mount_point = re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), parts[4])
+                    mount_points.append(os.path.abspath(mount_point))
         
         # Sort mount points by length descending to check most specific paths first
         mount_points.sort(key=len, reverse=True)
@@ -279,22 +843,21 @@ class VirtOTG:
         """Destroy the domain to release disk locks."""
         try: 
             # check if it is running
-            dominfo = self.run_command(f"virsh dominfo {self.domain}")
-            if "shut off" in dominfo:
+            dominfo = self._get_dominfo()
+            if dominfo['state'] == libvirt.VIR_DOMAIN_SHUTOFF:
                 logging.info("Domain is already shut off")
                 return
 
-            self.run_command(f"virsh destroy {self.domain}")
+            logging.info(f"Destroying domain {self.domain}")
+            dom = self._lookup_domain()
+            self._dominfo = None
+            dom.destroy()
 
             # Wait for the domain to be destroyed
-            while True:
-                try:
-                    dominfo = self.run_command(f"virsh dominfo {self.domain}")
-                    if "shut off" in dominfo:
-                        break
-                except subprocess.CalledProcessError:
-                    break
-                time.sleep(1)
+            if not self._poll_until(lambda: not dom.isActive(), on_error='done'):
+                raise TimeoutError(f"Domain {self.domain} was not destroyed within 60 seconds")
+            dominfo['state'] = libvirt.VIR_DOMAIN_SHUTOFF
+            self._dominfo = dominfo
                 
         except Exception as e:
             logging.error(f"Failed to destroy domain: {e}")
@@ -307,22 +870,23 @@ class VirtOTG:
             bool: True if successful, False if domain already has autostart disabled
         
         Raises:
-            subprocess.CalledProcessError: If the virsh command fails
+            libvirt.libvirtError: If the libvirt call fails
             Exception: For other errors during execution
         """
         try:
             # Check current autostart status
-            status = self.run_command(f"virsh dominfo {self.domain}")
-            if "Autostart:        disable" in status:
+            dominfo = self._get_dominfo()
+            if not dominfo['autostart']:
                 logging.info(f"Autostart already disabled for domain {self.domain}")
                 return False
                 
             # Disable autostart
-            self.run_command(f"virsh autostart --disable {self.domain}")
+            self._lookup_domain().setAutostart(0)
+            dominfo['autostart'] = False
             logging.info(f"Successfully disabled autostart for domain {self.domain}")
             return True
             
-        except subprocess.CalledProcessError as e:
+        except libvirt.libvirtError as e:
             logging.error(f"Failed to disable autostart: {e}")
             raise
         except Exception as e:
@@ -336,22 +900,23 @@ class VirtOTG:
             bool: True if successful, False if domain already has autostart enabled
         
         Raises:
-            subprocess.CalledProcessError: If the virsh command fails
+            libvirt.libvirtError: If the libvirt call fails
             Exception: For other errors during execution
         """
         try:
             # Check current autostart status
-            status = self.run_command(f"virsh dominfo {self.domain}")
-            if "Autostart:        enable" in status:
+            dominfo = self._get_dominfo()
+            if dominfo['autostart']:
                 logging.info(f"Autostart already enabled for domain {self.domain}")
                 return False
                 
             # Enable autostart
-            self.run_command(f"virsh autostart {self.domain}")
+            self._lookup_domain().setAutostart(1)
+            dominfo['autostart'] = True
             logging.info(f"Successfully enabled autostart for domain {self.domain}")
             return True
             
-        except subprocess.CalledProcessError as e:
+        except libvirt.libvirtError as e:
             logging.error(f"Failed to enable autostart: {e}")
             raise
         except Exception as e:
@@ -366,42 +931,35 @@ class VirtOTG:
             bool: True if domain was started, False if it was already running
             
         Raises:
-            subprocess.CalledProcessError: If the virsh command fails
+            libvirt.libvirtError: If the libvirt call fails
             TimeoutError: If domain fails to start within timeout period
             Exception: For other errors during execution
         """
         try:
             # Check current domain status
-            dominfo = self.run_command(f"virsh dominfo {self.domain}")
-            if "running" in dominfo:
+            dominfo = self._get_dominfo()
+            if dominfo['state'] == libvirt.VIR_DOMAIN_RUNNING:
                 logging.info(f"Domain {self.domain} is already running")
                 return False
                 
             # Start the domain
-            self.run_command(f"virsh start {self.domain}")
+            logging.info(f"Starting domain {self.domain}")
+            dom = self._lookup_domain()
+            self._dominfo = None
+            dom.create()
             
             # Wait for domain to be fully running
             timeout = 60  # seconds
-            start_time = time.time()
-            
-            while True:
-                try:
-                    dominfo = self.run_command(f"virsh dominfo {self.domain}")
-                    if "running" in dominfo:
-                        logging.info(f"Successfully started domain {self.domain}")
-                        return True
-                        
-                    if time.time() - start_time > timeout:
-                        raise TimeoutError(f"Domain {self.domain} failed to start within {timeout} seconds")
-                        
-                    time.sleep(1)
-                    
-                except subprocess.CalledProcessError as e:
-                    if time.time() - start_time > timeout:
-                        raise TimeoutError(f"Domain {self.domain} failed to start within {timeout} seconds")
-                    time.sleep(1)
+            if not self._poll_until(lambda: dom.state()[0] == libvirt.VIR_DOMAIN_RUNNING,
+                                    timeout=timeout, on_error='retry'):
+                raise TimeoutError(f"Domain {self.domain} failed to start within {timeout} seconds")
+            dominfo['state'] = libvirt.VIR_DOMAIN_RUNNING
+            self._dominfo = dominfo
+
+            logging.info(f"Successfully started domain {self.domain}")
+            return True
                     
-        except subprocess.CalledProcessError as e:
+        except libvirt.libvirtError as e:
             logging.error(f"Failed to start domain: {e}")
             raise
         except TimeoutError as e: